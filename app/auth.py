@@ -37,6 +37,7 @@ def get_current_user(user_id: str = Depends(get_current_user_id)):
         )
     return {
         "id": str(user["_id"]),
+        "_oid": user["_id"],  # ObjectId form of "id" so handlers don't re-parse it
         "email": user["email"],
         "role": user.get("role", "user"),
     }
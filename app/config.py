@@ -27,6 +27,10 @@ MEDIA_DIR = BASE_DIR / "media"
 SONGS_DIR = MEDIA_DIR / "songs"
 THUMBNAILS_DIR = MEDIA_DIR / "thumbnails"
 
+# String forms of the media paths, built once for os.path / StaticFiles use
+SONGS_DIR_STR = str(SONGS_DIR)
+THUMBNAILS_DIR_STR = str(THUMBNAILS_DIR)
+
 # Ensure directories exist
 SONGS_DIR.mkdir(parents=True, exist_ok=True)
 THUMBNAILS_DIR.mkdir(parents=True, exist_ok=True)
@@ -1,7 +1,10 @@
-from pymongo import MongoClient
+import logging
+from pymongo import MongoClient, ASCENDING, DESCENDING
 from pymongo.database import Database
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 client: MongoClient = None
 db: Database = None
 
@@ -32,3 +35,31 @@ FAVORITES_COLLECTION = "favorites"
 PLAYLISTS_COLLECTION = "playlists"
 EMAIL_CONFIG_COLLECTION = "email_config"
 
+
+def ensure_indexes():
+    """Create indexes backing the application's queries (no-op if they exist)"""
+    db = get_db()
+    
+    indexes = [
+        # list_sessions: filter by user, newest first
+        (SESSIONS_COLLECTION, [("user_id", ASCENDING), ("started_at", DESCENDING)], {}),
+        # start_session / get_active_session / heartbeat: recently active sessions
+        (SESSIONS_COLLECTION, [("user_id", ASCENDING), ("is_active", ASCENDING), ("last_event_at", DESCENDING)], {}),
+        # get_latest_session and logout summary: latest ended session
+        (SESSIONS_COLLECTION, [("user_id", ASCENDING), ("is_active", ASCENDING), ("ended_at", DESCENDING)], {}),
+        # Idle-session cleanup job
+        (SESSIONS_COLLECTION, [("is_active", ASCENDING), ("last_event_at", ASCENDING)], {}),
+        # Latest email config lookup (find_one sorted by updated_at)
+        (EMAIL_CONFIG_COLLECTION, [("updated_at", DESCENDING)], {}),
+        # For future use by the favorites routes (currently stubs that don't
+        # touch this collection): one favorite per (user, song)
+        (FAVORITES_COLLECTION, [("user_id", ASCENDING), ("song_id", ASCENDING)], {"unique": True}),
+    ]
+    
+    # Create each index on its own so one failure (e.g. duplicates blocking
+    # the unique index) doesn't prevent the others from being created
+    for collection, keys, options in indexes:
+        try:
+            db[collection].create_index(keys, **options)
+        except Exception as e:
+            logger.warning(f"Failed to create index {keys} on {collection}: {e}")
@@ -8,11 +8,15 @@ from pathlib import Path
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
-from app.config import settings, API_V1_PREFIX, load_email_config_from_db, initialize_email_config_from_env
-from app.db import connect_db, close_db
+from app.config import (
+    settings, API_V1_PREFIX, SONGS_DIR_STR, THUMBNAILS_DIR_STR,
+    load_email_config_from_db, initialize_email_config_from_env,
+)
+from app.db import connect_db, close_db, ensure_indexes
 from app.music.ml_service import load_models
 from app.routes import auth_routes, music_admin_routes, song_routes, session_routes, playlist_routes
 from app.music.session_cleanup import cleanup_inactive_sessions
+from app.utils.email_service import close_smtp_client
 
 # Suppress bcrypt warnings
 warnings.filterwarnings("ignore", message=".*bcrypt.*")
@@ -42,17 +46,9 @@ app.add_middleware(
 )
 
 # Mount static files for serving MP3s and thumbnails
-if settings.SONGS_DIR.exists():
-    app.mount("/media/songs", StaticFiles(directory=str(settings.SONGS_DIR)), name="songs")
-else:
-    settings.SONGS_DIR.mkdir(parents=True, exist_ok=True)
-    app.mount("/media/songs", StaticFiles(directory=str(settings.SONGS_DIR)), name="songs")
-
-if settings.THUMBNAILS_DIR.exists():
-    app.mount("/media/thumbnails", StaticFiles(directory=str(settings.THUMBNAILS_DIR)), name="thumbnails")
-else:
-    settings.THUMBNAILS_DIR.mkdir(parents=True, exist_ok=True)
-    app.mount("/media/thumbnails", StaticFiles(directory=str(settings.THUMBNAILS_DIR)), name="thumbnails")
+# (media directories are created once when app.config is imported)
+app.mount("/media/songs", StaticFiles(directory=SONGS_DIR_STR), name="songs")
+app.mount("/media/thumbnails", StaticFiles(directory=THUMBNAILS_DIR_STR), name="thumbnails")
 
 # Include routers
 app.include_router(auth_routes.router, prefix=API_V1_PREFIX)
@@ -72,6 +68,12 @@ async def startup_event():
         connect_db()
         logger.info("Connected to MongoDB")
         
+        # Create query indexes (safe to repeat; existing indexes are kept)
+        try:
+            ensure_indexes()
+        except Exception as e:
+            logger.warning(f"Failed to ensure MongoDB indexes: {e}")
+        
         # Initialize email configuration (from env vars if DB config doesn't exist)
         initialize_email_config_from_env()
         
@@ -104,16 +106,16 @@ async def startup_event():
     
     # Start APScheduler for background tasks
     try:
-        # Schedule session cleanup task to run every 5 minutes
+        # Schedule session cleanup task to run every minute
         scheduler.add_job(
             cleanup_inactive_sessions,
-            trigger=IntervalTrigger(minutes=5),
+            trigger=IntervalTrigger(minutes=1),
             id="session_cleanup",
             name="Auto-end inactive sessions",
             replace_existing=True
         )
         scheduler.start()
-        logger.info("APScheduler started - session cleanup task scheduled (every 5 minutes)")
+        logger.info("APScheduler started - session cleanup task scheduled (every minute)")
     except Exception as e:
         logger.error(f"Failed to start APScheduler: {e}")
         # Don't raise - allow API to start without scheduler
@@ -129,6 +131,9 @@ async def shutdown_event():
         scheduler.shutdown(wait=False)
         logger.info("APScheduler shutdown")
     
+    # Close the shared SMTP connection used for email alerts
+    await close_smtp_client()
+    
     close_db()
 
 
@@ -1,12 +1,35 @@
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from app.db import get_db, SESSIONS_COLLECTION
 
 logger = logging.getLogger(__name__)
 
+# Sessions with no activity for this long are considered abandoned
+SESSION_IDLE_TIMEOUT = timedelta(minutes=10)
+
+
 def cleanup_inactive_sessions():
     """
-    Dummy session cleanup.
-    Real auto-ending logic will be added later.
+    Mark idle listening sessions as ended.
+    Runs on the APScheduler interval so start_session doesn't have to
+    garbage-collect stale sessions on the request path.
     """
     now = datetime.utcnow()
-    logger.info(f"🧹 Dummy cleanup ran at {now} — no sessions processed.")
+    cutoff = now - SESSION_IDLE_TIMEOUT
+
+    db = get_db()
+    result = db[SESSIONS_COLLECTION].update_many(
+        {
+            "is_active": True,
+            "$or": [
+                {"last_event_at": {"$lt": cutoff}},
+                # Older sessions may predate last_event_at
+                {"last_event_at": {"$exists": False}, "started_at": {"$lt": cutoff}},
+            ],
+        },
+        {"$set": {"is_active": False, "ended_at": now, "updated_at": now}}
+    )
+
+    if result.modified_count:
+        logger.info(f"Session cleanup ended {result.modified_count} inactive session(s)")
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from fastapi.security import HTTPBearer
-from bson import ObjectId
 from datetime import datetime, timedelta
 from google.oauth2 import id_token
 from google.auth.transport import requests
@@ -111,7 +110,7 @@ async def logout(
 ):
     """Logout user and send latest session summary email"""
     db = get_db()
-    user_id = ObjectId(current_user["id"])
+    user_id = current_user["_oid"]
     user_email = current_user["email"]
     
     # Get latest session with prediction (only for regular users, not admin)
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse
 from bson import ObjectId
-from datetime import datetime, timedelta
+from datetime import datetime
+from itertools import chain
 from typing import List, Optional
 
 from app.db import get_db, SESSIONS_COLLECTION, SONGS_COLLECTION, USERS_COLLECTION
@@ -11,6 +13,7 @@ from app.models import (
 )
 from app.auth import get_current_user
 from app.music.ml_service import predict_session, load_models
+from app.music.session_cleanup import SESSION_IDLE_TIMEOUT
 from app.utils.email_service import send_stress_alert, send_depression_alert
 import logging
 
@@ -31,44 +34,37 @@ async def start_session(
         )
     
     db = get_db()
-    user_id = ObjectId(current_user["id"])
+    user_id = current_user["_oid"]
     started_at = datetime.utcnow()
     
-    # Check for existing active session
-    active_session = db[SESSIONS_COLLECTION].find_one({
-        "user_id": user_id,
-        "is_active": True
-    })
+    # Return the existing active session if it has seen activity recently.
+    # Idle sessions are ended by the background cleanup job, so they are
+    # simply ignored here.
+    active_session = db[SESSIONS_COLLECTION].find_one(
+        {
+            "user_id": user_id,
+            "is_active": True,
+            "last_event_at": {"$gte": started_at - SESSION_IDLE_TIMEOUT}
+        },
+        sort=[("last_event_at", -1)]
+    )
     
-    # If active session exists, check if it's been >10 minutes since last event
     if active_session:
-        last_event_at = active_session.get("last_event_at", active_session.get("started_at"))
-        time_since_last_event = started_at - last_event_at
-        
-        # If >10 minutes gap, end the old session
-        if time_since_last_event > timedelta(minutes=10):
-            # End old session by marking as inactive
-            db[SESSIONS_COLLECTION].update_one(
-                {"_id": active_session["_id"]},
-                {"$set": {"is_active": False, "ended_at": started_at, "updated_at": started_at}}
-            )
-        else:
-            # Return existing active session
-            return SessionStartResponse(
-                session_id=str(active_session["_id"]),
-                started_at=active_session["started_at"]
-            )
+        return SessionStartResponse(
+            session_id=str(active_session["_id"]),
+            started_at=active_session["started_at"]
+        )
     
     # Validate song exists if song_id provided
     song_id = None
     if session_data.song_id:
-        song = db[SONGS_COLLECTION].find_one({"_id": ObjectId(session_data.song_id)})
+        song_id = ObjectId(session_data.song_id)
+        song = db[SONGS_COLLECTION].find_one({"_id": song_id})
         if not song:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Song not found"
             )
-        song_id = ObjectId(session_data.song_id)
     
     # Create new session
     session_doc = {
@@ -112,7 +108,7 @@ async def end_session(
         )
     
     # Verify session belongs to current user
-    if str(session_doc["user_id"]) != current_user["id"]:
+    if session_doc["user_id"] != current_user["_oid"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied"
@@ -157,7 +153,7 @@ async def end_session(
     
     if stress_level == "high" or depression_level == "high":
         # Get user email from database
-        user_doc = db[USERS_COLLECTION].find_one({"_id": ObjectId(current_user["id"])})
+        user_doc = db[USERS_COLLECTION].find_one({"_id": current_user["_oid"]})
         if user_doc:
             user_email = user_doc.get("email", "")
             
@@ -183,12 +179,18 @@ async def get_active_session(
 ):
     """Get active session for current user"""
     db = get_db()
-    user_id = ObjectId(current_user["id"])
+    user_id = current_user["_oid"]
     
-    active_session = db[SESSIONS_COLLECTION].find_one({
-        "user_id": user_id,
-        "is_active": True
-    })
+    # Sessions idle past the timeout count as ended even before the
+    # cleanup job marks them inactive
+    active_session = db[SESSIONS_COLLECTION].find_one(
+        {
+            "user_id": user_id,
+            "is_active": True,
+            "last_event_at": {"$gte": datetime.utcnow() - SESSION_IDLE_TIMEOUT}
+        },
+        sort=[("last_event_at", -1)]
+    )
     
     if not active_session:
         return None
@@ -206,13 +208,18 @@ async def heartbeat_session(
 ):
     """Update last_event_at timestamp for active session (heartbeat)"""
     db = get_db()
-    user_id = ObjectId(current_user["id"])
+    user_id = current_user["_oid"]
     session_oid = ObjectId(session_id)
     now = datetime.utcnow()
     
-    # Update session heartbeat
+    # Update session heartbeat (idle sessions awaiting cleanup can't be revived)
     result = db[SESSIONS_COLLECTION].update_one(
-        {"_id": session_oid, "user_id": user_id, "is_active": True},
+        {
+            "_id": session_oid,
+            "user_id": user_id,
+            "is_active": True,
+            "last_event_at": {"$gte": now - SESSION_IDLE_TIMEOUT}
+        },
         {"$set": {"last_event_at": now, "updated_at": now}}
     )
     
@@ -231,7 +238,7 @@ async def get_latest_session(
 ):
     """Get the latest completed session with prediction for current user"""
     db = get_db()
-    user_id = ObjectId(current_user["id"])
+    user_id = current_user["_oid"]
     
     # Find latest completed session (not active, has prediction)
     latest_session = db[SESSIONS_COLLECTION].find_one(
@@ -252,42 +259,60 @@ async def get_latest_session(
     if latest_session.get("song_id"):
         latest_session["song_id"] = str(latest_session["song_id"])
     
-    # Convert prediction
+    # Convert prediction (stored by end_session, so skip re-validation)
     if latest_session.get("prediction"):
         prediction = latest_session["prediction"]
-        latest_session["prediction"] = PredictionResponse(**prediction)
+        latest_session["prediction"] = PredictionResponse.model_construct(**prediction)
     
-    return SessionResponse(**latest_session)
+    return SessionResponse.model_construct(**latest_session)
 
 
 @router.get("", response_model=List[SessionResponse])
 async def list_sessions(
     current_user: dict = Depends(get_current_user)
 ):
-    """Get all sessions for current user"""
+    """
+    Get all sessions for current user.
+    
+    Sessions are streamed and built with model_construct (they were validated
+    by end_session when stored), so response_model is not enforced here: a
+    stored document missing a required field yields an element without that key.
+    """
     db = get_db()
-    user_id = ObjectId(current_user["id"])
+    user_id = current_user["_oid"]
     
-    sessions = list(db[SESSIONS_COLLECTION].find(
+    cursor = db[SESSIONS_COLLECTION].find(
         {"user_id": user_id},
         sort=[("started_at", -1)]
-    ).limit(50))
-    
-    result = []
-    for session in sessions:
-        session["id"] = str(session["_id"])
-        session["user_id"] = str(session["user_id"])
-        if session.get("song_id"):
-            session["song_id"] = str(session["song_id"])
-        
-        # Convert prediction if exists
-        if session.get("prediction"):
-            prediction = session["prediction"]
-            session["prediction"] = PredictionResponse(**prediction)
-        
-        result.append(SessionResponse(**session))
-    
-    return result
+    ).limit(50)
+    
+    # Run the query (and fetch its first batch) before the response starts,
+    # so database errors still surface as a normal HTTP error
+    first_session = next(cursor, None)
+    sessions = chain([first_session], cursor) if first_session is not None else iter(())
+    
+    def stream_sessions():
+        # Serialize each session as the cursor yields it instead of
+        # materializing the whole result list first
+        yield b"["
+        first = True
+        for session in sessions:
+            session["id"] = str(session["_id"])
+            session["user_id"] = str(session["user_id"])
+            if session.get("song_id"):
+                session["song_id"] = str(session["song_id"])
+            
+            # Convert prediction if exists (stored by end_session, so skip re-validation)
+            if session.get("prediction"):
+                prediction = session["prediction"]
+                session["prediction"] = PredictionResponse.model_construct(**prediction)
+            
+            piece = SessionResponse.model_construct(**session).model_dump_json().encode()
+            yield piece if first else b"," + piece
+            first = False
+        yield b"]"
+    
+    return StreamingResponse(stream_sessions(), media_type="application/json")
 
 
 @router.get("/{session_id}", response_model=SessionResponse)
@@ -307,7 +332,7 @@ async def get_session(
         )
     
     # Verify session belongs to current user
-    if str(session_doc["user_id"]) != current_user["id"]:
+    if session_doc["user_id"] != current_user["_oid"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied"
@@ -1,5 +1,6 @@
+import asyncio
 import logging
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 import aiosmtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -7,6 +8,120 @@ from app.config import settings, refresh_email_config
 
 logger = logging.getLogger(__name__)
 
+# Close the shared SMTP connection after this many seconds without a send
+SMTP_IDLE_TIMEOUT_SECONDS = 60
+
+# Shared SMTP connection, reused across sends so the TLS handshake and login
+# happen once per burst of emails rather than once per message
+_smtp_client: Optional[aiosmtplib.SMTP] = None
+_smtp_client_key: Optional[Tuple[str, int, str, str]] = None
+_smtp_idle_handle: Optional[asyncio.TimerHandle] = None
+_smtp_close_task: Optional[asyncio.Task] = None
+_smtp_lock = asyncio.Lock()
+
+
+def _drop_smtp_client():
+    """Close the shared SMTP connection without QUIT and forget it. Caller must hold _smtp_lock."""
+    global _smtp_client, _smtp_client_key
+    if _smtp_client is not None:
+        _smtp_client.close()
+    _smtp_client = None
+    _smtp_client_key = None
+
+
+async def _get_smtp_client(smtp_host: str, smtp_port: int, smtp_user: str, smtp_password: str) -> aiosmtplib.SMTP:
+    """Return a connected SMTP client for the given settings, reconnecting if needed. Caller must hold _smtp_lock."""
+    global _smtp_client, _smtp_client_key
+    
+    key = (smtp_host, smtp_port, smtp_user, smtp_password)
+    if _smtp_client is not None and (_smtp_client_key != key or not _smtp_client.is_connected):
+        # Settings changed or the server dropped us - start over
+        _drop_smtp_client()
+    
+    if _smtp_client is None:
+        # For port 587 (Gmail), use STARTTLS (upgrade plain connection to TLS)
+        # For port 465, use direct SSL/TLS connection
+        if smtp_port == 465:
+            # Port 465 uses direct SSL/TLS (implicit TLS)
+            client = aiosmtplib.SMTP(
+                hostname=smtp_host,
+                port=smtp_port,
+                username=smtp_user,
+                password=smtp_password,
+                use_tls=True,  # Direct SSL/TLS
+            )
+        else:
+            # Port 587 and others use STARTTLS (explicit TLS upgrade)
+            client = aiosmtplib.SMTP(
+                hostname=smtp_host,
+                port=smtp_port,
+                username=smtp_user,
+                password=smtp_password,
+                use_tls=False,  # Don't use direct TLS
+                start_tls=True,  # Use STARTTLS instead
+            )
+        # connect() also performs STARTTLS and login with the settings above
+        try:
+            await client.connect()
+        except Exception:
+            # Don't leak the socket if STARTTLS or login fails after connecting
+            client.close()
+            raise
+        _smtp_client = client
+        _smtp_client_key = key
+    
+    return _smtp_client
+
+
+async def _send_on_shared_client(message, smtp_host: str, smtp_port: int, smtp_user: str, smtp_password: str):
+    """Send one message over the shared connection. Caller must hold _smtp_lock."""
+    client = await _get_smtp_client(smtp_host, smtp_port, smtp_user, smtp_password)
+    try:
+        await client.send_message(message)
+    except Exception:
+        # The connection is in an unknown state after a failed transaction
+        # (e.g. a late reply may still be pending), so never reuse it
+        _drop_smtp_client()
+        raise
+
+
+def _start_smtp_idle_close():
+    """Idle timer callback: close the shared connection, keeping a reference to the task"""
+    global _smtp_close_task
+    _smtp_close_task = asyncio.ensure_future(close_smtp_client())
+
+
+def _schedule_smtp_idle_close():
+    """(Re)start the idle timer that closes the shared SMTP connection"""
+    global _smtp_idle_handle
+    if _smtp_idle_handle is not None:
+        _smtp_idle_handle.cancel()
+    loop = asyncio.get_running_loop()
+    _smtp_idle_handle = loop.call_later(
+        SMTP_IDLE_TIMEOUT_SECONDS,
+        _start_smtp_idle_close,
+    )
+
+
+async def close_smtp_client():
+    """Close the shared SMTP connection if one is open"""
+    global _smtp_client, _smtp_client_key, _smtp_idle_handle
+    
+    async with _smtp_lock:
+        if _smtp_idle_handle is not None:
+            _smtp_idle_handle.cancel()
+            _smtp_idle_handle = None
+        
+        if _smtp_client is None:
+            return
+        
+        try:
+            await _smtp_client.quit()
+        except Exception:
+            _smtp_client.close()
+        _smtp_client = None
+        _smtp_client_key = None
+
 
 async def send_email(to_email: str, subject: str, body_html: str, body_text: Optional[str] = None) -> bool:
     """
@@ -45,8 +160,13 @@ async def send_email(to_email: str, subject: str, body_html: str, body_text: Opt
         smtp_password = settings.SMTP_PASSWORD
         smtp_from = settings.SMTP_FROM or smtp_user
         
-        # Create message
-        message = MIMEMultipart("alternative")
+        # Create message - multipart only when there is a plain text alternative
+        if body_text:
+            message = MIMEMultipart("alternative")
+            message.attach(MIMEText(body_text, "plain"))
+            message.attach(MIMEText(body_html, "html"))
+        else:
+            message = MIMEText(body_html, "html")
         message["Subject"] = subject
         
         # Format From address - if SMTP_FROM doesn't include a name, add one
@@ -58,40 +178,14 @@ async def send_email(to_email: str, subject: str, body_html: str, body_text: Opt
         
         message["To"] = to_email
         
-        # Add plain text part if provided
-        if body_text:
-            text_part = MIMEText(body_text, "plain")
-            message.attach(text_part)
-        
-        # Add HTML part
-        html_part = MIMEText(body_html, "html")
-        message.attach(html_part)
-        
-        # Send email
-        # For port 587 (Gmail), use STARTTLS (upgrade plain connection to TLS)
-        # For port 465, use direct SSL/TLS connection
-        if smtp_port == 465:
-            # Port 465 uses direct SSL/TLS (implicit TLS)
-            await aiosmtplib.send(
-                message,
-                hostname=smtp_host,
-                port=smtp_port,
-                username=smtp_user,
-                password=smtp_password,
-                use_tls=True,  # Direct SSL/TLS
-            )
-        else:
-            # Port 587 and others use STARTTLS (explicit TLS upgrade)
-            # Use the helper function with start_tls=True parameter
-            await aiosmtplib.send(
-                message,
-                hostname=smtp_host,
-                port=smtp_port,
-                username=smtp_user,
-                password=smtp_password,
-                use_tls=False,  # Don't use direct TLS
-                start_tls=True,  # Use STARTTLS instead
-            )
+        # Send email over the shared connection (one message at a time)
+        async with _smtp_lock:
+            try:
+                await _send_on_shared_client(message, smtp_host, smtp_port, smtp_user, smtp_password)
+            except aiosmtplib.SMTPServerDisconnected:
+                # Server closed the idle connection - reconnect once and retry
+                await _send_on_shared_client(message, smtp_host, smtp_port, smtp_user, smtp_password)
+            _schedule_smtp_idle_close()
         
         logger.info(f"Email sent successfully to {to_email} from {smtp_from}: {subject}")
         return True
@@ -101,22 +195,16 @@ async def send_email(to_email: str, subject: str, body_html: str, body_text: Opt
         return False
 
 
-def create_stress_alert_email_body(user_email: str, prediction_data: Dict[str, Any]) -> Tuple[str, str]:
-    """
-    Create email body for stress alert.
-    
-    Args:
-        user_email: User's email address
-        prediction_data: Prediction data containing stress/depression levels and explanations
-        
-    Returns:
-        Tuple of (html_body, text_body)
-    """
-    stress_level = prediction_data.get("stress_level", "Unknown")
-    depression_level = prediction_data.get("depression_level", "Unknown")
-    explanations = prediction_data.get("explanations", [])
-    
-    html_body = f"""
+def _render_explanations(explanations: List[str]) -> Tuple[str, str]:
+    """Render the first five explanations as (HTML <li> items, plain text "- " lines)"""
+    top = explanations[:5]
+    html_items = ''.join(f'<li class="explanation">{exp}</li>' for exp in top)
+    text_lines = '\n'.join('- ' + exp for exp in top)
+    return html_items, text_lines
+
+
+# Email bodies are str.format templates (literal CSS braces are doubled)
+_STRESS_ALERT_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -145,7 +233,7 @@ def create_stress_alert_email_body(user_email: str, prediction_data: Dict[str, A
                 
                 <h3>Session Insights:</h3>
                 <ul>
-                    {''.join([f'<li class="explanation">{exp}</li>' for exp in explanations[:5]])}
+                    {explanations_html}
                 </ul>
                 
                 <h3>Recommendations:</h3>
@@ -168,8 +256,8 @@ def create_stress_alert_email_body(user_email: str, prediction_data: Dict[str, A
     </body>
     </html>
     """
-    
-    text_body = f"""
+
+_STRESS_ALERT_TEXT = """
 M_Track Mood Alert
 
 IMPORTANT: Elevated Stress Detected
@@ -180,7 +268,7 @@ Stress Level: {stress_level}
 Depression Level: {depression_level}
 
 Session Insights:
-{chr(10).join(['- ' + exp for exp in explanations[:5]])}
+{explanations_text}
 
 Recommendations:
 - Consider listening to calming or relaxing music
@@ -195,13 +283,11 @@ If you're experiencing ongoing stress or depression, please seek professional he
 This is an automated alert from M_Track - AI-Based Music Behavior Analysis Platform
 You received this email because your recent session indicated elevated stress levels.
     """
-    
-    return html_body, text_body
 
 
-def create_depression_alert_email_body(user_email: str, prediction_data: Dict[str, Any]) -> Tuple[str, str]:
+def create_stress_alert_email_body(user_email: str, prediction_data: Dict[str, Any]) -> Tuple[str, str]:
     """
-    Create email body for depression alert.
+    Create email body for stress alert.
     
     Args:
         user_email: User's email address
@@ -214,7 +300,21 @@ def create_depression_alert_email_body(user_email: str, prediction_data: Dict[st
     depression_level = prediction_data.get("depression_level", "Unknown")
     explanations = prediction_data.get("explanations", [])
     
-    html_body = f"""
+    explanations_html, explanations_text = _render_explanations(explanations)
+    
+    fields = {
+        "stress_level": stress_level,
+        "depression_level": depression_level,
+        "explanations_html": explanations_html,
+        "explanations_text": explanations_text,
+    }
+    html_body = _STRESS_ALERT_HTML.format_map(fields)
+    text_body = _STRESS_ALERT_TEXT.format_map(fields)
+    
+    return html_body, text_body
+
+
+_DEPRESSION_ALERT_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -244,7 +344,7 @@ def create_depression_alert_email_body(user_email: str, prediction_data: Dict[st
                 
                 <h3>Session Insights:</h3>
                 <ul>
-                    {''.join([f'<li class="explanation">{exp}</li>' for exp in explanations[:5]])}
+                    {explanations_html}
                 </ul>
                 
                 <h3>Recommendations:</h3>
@@ -277,8 +377,8 @@ def create_depression_alert_email_body(user_email: str, prediction_data: Dict[st
     </body>
     </html>
     """
-    
-    text_body = f"""
+
+_DEPRESSION_ALERT_TEXT = """
 M_Track Mood Alert
 
 IMPORTANT: Elevated Depression Detected
@@ -289,7 +389,7 @@ Stress Level: {stress_level}
 Depression Level: {depression_level}
 
 Session Insights:
-{chr(10).join(['- ' + exp for exp in explanations[:5]])}
+{explanations_text}
 
 Recommendations:
 - Consider listening to uplifting or energetic music
@@ -310,6 +410,33 @@ If you're experiencing ongoing depression, please seek professional help.
 This is an automated alert from M_Track - AI-Based Music Behavior Analysis Platform
 You received this email because your recent session indicated elevated depression levels.
     """
+
+
+def create_depression_alert_email_body(user_email: str, prediction_data: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Create email body for depression alert.
+    
+    Args:
+        user_email: User's email address
+        prediction_data: Prediction data containing stress/depression levels and explanations
+        
+    Returns:
+        Tuple of (html_body, text_body)
+    """
+    stress_level = prediction_data.get("stress_level", "Unknown")
+    depression_level = prediction_data.get("depression_level", "Unknown")
+    explanations = prediction_data.get("explanations", [])
+    
+    explanations_html, explanations_text = _render_explanations(explanations)
+    
+    fields = {
+        "stress_level": stress_level,
+        "depression_level": depression_level,
+        "explanations_html": explanations_html,
+        "explanations_text": explanations_text,
+    }
+    html_body = _DEPRESSION_ALERT_HTML.format_map(fields)
+    text_body = _DEPRESSION_ALERT_TEXT.format_map(fields)
     
     return html_body, text_body
 
@@ -348,20 +475,7 @@ async def send_depression_alert(user_email: str, prediction_data: Dict[str, Any]
     return await send_email(user_email, subject, html_body, text_body)
 
 
-def create_welcome_email_body(user_email: str, user_name: Optional[str] = None) -> Tuple[str, str]:
-    """
-    Create welcome email body for new user registration.
-    
-    Args:
-        user_email: User's email address
-        user_name: User's name (optional)
-        
-    Returns:
-        Tuple of (html_body, text_body)
-    """
-    display_name = user_name or user_email.split('@')[0]
-    
-    html_body = f"""
+_WELCOME_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -434,8 +548,8 @@ def create_welcome_email_body(user_email: str, user_name: Optional[str] = None)
     </body>
     </html>
     """
-    
-    text_body = f"""
+
+_WELCOME_TEXT = """
 Welcome to M_Track!
 
 Hi {display_name},
@@ -470,6 +584,24 @@ The M_Track Team
 This is an automated email from M_Track - AI-Based Music Behavior Analysis Platform
 You received this email because you registered an account with this email address.
     """
+
+
+def create_welcome_email_body(user_email: str, user_name: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Create welcome email body for new user registration.
+    
+    Args:
+        user_email: User's email address
+        user_name: User's name (optional)
+        
+    Returns:
+        Tuple of (html_body, text_body)
+    """
+    display_name = user_name or user_email.split('@')[0]
+    
+    fields = {"display_name": display_name}
+    html_body = _WELCOME_HTML.format_map(fields)
+    text_body = _WELCOME_TEXT.format_map(fields)
     
     return html_body, text_body
 
@@ -491,22 +623,7 @@ async def send_welcome_email(user_email: str, user_name: Optional[str] = None) -
     return await send_email(user_email, subject, html_body, text_body)
 
 
-def create_logout_email_body(user_email: str, prediction_data: Dict[str, Any]) -> Tuple[str, str]:
-    """Create email body for logout notification with latest session prediction"""
-    stress_level = prediction_data.get("stress_level", "Unknown")
-    depression_level = prediction_data.get("depression_level", "Unknown")
-    explanations = prediction_data.get("explanations", [])
-    
-    stress_class = stress_level.lower() if stress_level else "unknown"
-    depression_class = depression_level.lower() if depression_level else "unknown"
-    
-    # Build explanations HTML separately to avoid f-string nesting issues
-    explanations_html = ""
-    if explanations:
-        explanations_items = ''.join([f'<li class="explanation">{exp}</li>' for exp in explanations[:5]])
-        explanations_html = f'<h3>Session Insights:</h3><ul>{explanations_items}</ul>'
-    
-    html_body = f"""
+_LOGOUT_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -552,8 +669,8 @@ def create_logout_email_body(user_email: str, prediction_data: Dict[str, Any]) -
     </body>
     </html>
     """
-    
-    text_body = f"""
+
+_LOGOUT_TEXT = """
 M_Track Session Summary
 
 Hi there,
@@ -564,7 +681,7 @@ Session Results:
 Stress Level: {stress_level}
 Depression Level: {depression_level}
 
-{f'Session Insights:{chr(10)}{chr(10).join(["- " + exp for exp in explanations[:5]])}' if explanations else ''}
+{explanations_text}
 
 Thank you for using M_Track. See you next time!
 
@@ -572,6 +689,35 @@ Thank you for using M_Track. See you next time!
 This is an automated email from M_Track - AI-Based Music Behavior Analysis Platform
 You received this email because you logged out from your account.
     """
+
+
+def create_logout_email_body(user_email: str, prediction_data: Dict[str, Any]) -> Tuple[str, str]:
+    """Create email body for logout notification with latest session prediction"""
+    stress_level = prediction_data.get("stress_level", "Unknown")
+    depression_level = prediction_data.get("depression_level", "Unknown")
+    explanations = prediction_data.get("explanations", [])
+    
+    stress_class = stress_level.lower() if stress_level else "unknown"
+    depression_class = depression_level.lower() if depression_level else "unknown"
+    
+    # Insights section is omitted entirely when there are no explanations
+    explanations_html = ""
+    explanations_text = ""
+    if explanations:
+        explanations_items, explanations_lines = _render_explanations(explanations)
+        explanations_html = f'<h3>Session Insights:</h3><ul>{explanations_items}</ul>'
+        explanations_text = 'Session Insights:\n' + explanations_lines
+    
+    fields = {
+        "stress_level": stress_level,
+        "depression_level": depression_level,
+        "stress_class": stress_class,
+        "depression_class": depression_class,
+        "explanations_html": explanations_html,
+        "explanations_text": explanations_text,
+    }
+    html_body = _LOGOUT_HTML.format_map(fields)
+    text_body = _LOGOUT_TEXT.format_map(fields)
     
     return html_body, text_body
 
@@ -19,52 +19,69 @@ def check_email_config():
         connect_db()
         db = get_db()
         
-        # Get all email configs
-        configs = list(db[EMAIL_CONFIG_COLLECTION].find().sort("updated_at", -1))
+        # Get all email configs (password length is computed server-side so
+        # the password itself never leaves the database)
+        configs = list(db[EMAIL_CONFIG_COLLECTION].find(
+            {},
+            projection={
+                "smtp_host": 1,
+                "smtp_port": 1,
+                "smtp_user": 1,
+                "smtp_from": 1,
+                "enabled": 1,
+                "created_at": 1,
+                "updated_at": 1,
+                "created_by": 1,
+                "smtp_password_length": {"$strLenCP": {"$ifNull": ["$smtp_password", ""]}},
+            },
+        ).sort("updated_at", -1))
         
         if not configs:
             print("❌ No email configuration found in database.")
             return
         
-        print(f"📧 Found {len(configs)} email configuration(s) in database:\n")
+        # Collect the report and write it out in one go
+        buf = [f"📧 Found {len(configs)} email configuration(s) in database:\n"]
         
         for i, config in enumerate(configs, 1):
-            print(f"Configuration #{i}:")
-            print(f"   ID: {config.get('_id')}")
-            print(f"   SMTP Host: {config.get('smtp_host', 'N/A')}")
-            print(f"   SMTP Port: {config.get('smtp_port', 'N/A')}")
-            print(f"   SMTP User: {config.get('smtp_user', 'N/A')}")
-            print(f"   SMTP Password: {'*' * len(config.get('smtp_password', '')) if config.get('smtp_password') else 'Not Set'}")
-            print(f"   SMTP From: {config.get('smtp_from', 'N/A')}")
-            print(f"   Enabled: {config.get('enabled', False)}")
-            print(f"   Created At: {config.get('created_at', 'N/A')}")
-            print(f"   Updated At: {config.get('updated_at', 'N/A')}")
-            print(f"   Created By: {config.get('created_by', 'N/A')}")
-            print()
+            buf.append(f"Configuration #{i}:")
+            buf.append(f"   ID: {config.get('_id')}")
+            buf.append(f"   SMTP Host: {config.get('smtp_host', 'N/A')}")
+            buf.append(f"   SMTP Port: {config.get('smtp_port', 'N/A')}")
+            buf.append(f"   SMTP User: {config.get('smtp_user', 'N/A')}")
+            buf.append(f"   SMTP Password: {'*' * config['smtp_password_length'] if config.get('smtp_password_length') else 'Not Set'}")
+            buf.append(f"   SMTP From: {config.get('smtp_from', 'N/A')}")
+            buf.append(f"   Enabled: {config.get('enabled', False)}")
+            buf.append(f"   Created At: {config.get('created_at', 'N/A')}")
+            buf.append(f"   Updated At: {config.get('updated_at', 'N/A')}")
+            buf.append(f"   Created By: {config.get('created_by', 'N/A')}")
+            buf.append("")
         
         # Check the latest config (the one that should be used)
         latest_config = configs[0]
         
-        print("🔍 Status Check:")
+        buf.append("🔍 Status Check:")
         if latest_config.get('enabled'):
-            print("   ✅ Email is ENABLED")
+            buf.append("   ✅ Email is ENABLED")
         else:
-            print("   ❌ Email is DISABLED")
+            buf.append("   ❌ Email is DISABLED")
         
         if latest_config.get('smtp_user'):
-            print(f"   ✅ SMTP User is set: {latest_config.get('smtp_user')}")
+            buf.append(f"   ✅ SMTP User is set: {latest_config.get('smtp_user')}")
         else:
-            print("   ❌ SMTP User is NOT set")
+            buf.append("   ❌ SMTP User is NOT set")
         
-        if latest_config.get('smtp_password'):
-            print(f"   ✅ SMTP Password is set (length: {len(latest_config.get('smtp_password'))})")
+        if latest_config.get('smtp_password_length'):
+            buf.append(f"   ✅ SMTP Password is set (length: {latest_config.get('smtp_password_length')})")
         else:
-            print("   ❌ SMTP Password is NOT set")
+            buf.append("   ❌ SMTP Password is NOT set")
         
-        if latest_config.get('enabled') and latest_config.get('smtp_user') and latest_config.get('smtp_password'):
-            print("\n✅ Email configuration is COMPLETE and should work!")
+        if latest_config.get('enabled') and latest_config.get('smtp_user') and latest_config.get('smtp_password_length'):
+            buf.append("\n✅ Email configuration is COMPLETE and should work!")
         else:
-            print("\n❌ Email configuration is INCOMPLETE. Please run init_email_config.py to fix it.")
+            buf.append("\n❌ Email configuration is INCOMPLETE. Please run init_email_config.py to fix it.")
+        
+        sys.stdout.write("\n".join(buf) + "\n")
         
     except Exception as e:
         print(f"❌ Error: {e}")
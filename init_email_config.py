@@ -28,8 +28,10 @@ def init_email_config():
         connect_db()
         db = get_db()
         
-        # Check if config already exists
-        existing_config = db[EMAIL_CONFIG_COLLECTION].find_one(sort=[("updated_at", -1)])
+        # Check if config already exists (password not needed here)
+        existing_config = db[EMAIL_CONFIG_COLLECTION].find_one(
+            {}, projection={"smtp_password": 0}, sort=[("updated_at", -1)]
+        )
         
         if existing_config:
             print("⚠️  Email configuration already exists in database.")
@@ -111,13 +113,16 @@ def init_email_config():
             print(f"\n✅ Email configuration created successfully!")
             print(f"   Config ID: {result.inserted_id}")
         
-        print(f"\n📋 Configuration Summary:")
-        print(f"   SMTP Host: {smtp_host}")
-        print(f"   SMTP Port: {smtp_port}")
-        print(f"   SMTP User: {smtp_user}")
-        print(f"   SMTP From: {smtp_user}")
-        print(f"   Enabled: {enabled}")
-        print(f"\n💡 Restart your backend server for changes to take effect.")
+        summary = [
+            f"\n📋 Configuration Summary:",
+            f"   SMTP Host: {smtp_host}",
+            f"   SMTP Port: {smtp_port}",
+            f"   SMTP User: {smtp_user}",
+            f"   SMTP From: {smtp_user}",
+            f"   Enabled: {enabled}",
+            f"\n💡 Restart your backend server for changes to take effect.",
+        ]
+        sys.stdout.write("\n".join(summary) + "\n")
         
     except Exception as e:
         print(f"❌ Error: {e}")